@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
+import heapq
+import itertools
+import os
 from argparse import ArgumentParser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import attrgetter
 
 class Job:
+    __slots__ = ("arrival_time", "remaining_burst_time", "total_run_time", "job_number", "first_run_time", "completion_time", "is_first_run")
+
     def __init__(self, arrival_time, run_time, job_number):
         self.arrival_time              = arrival_time # job arrival time
         self.remaining_burst_time      = run_time     # remaining burst time
@@ -10,9 +18,15 @@ class Job:
         self.first_run_time            = -1           # the first time the job runs (default = -1 => job has not yet run)
         self.completion_time           = -1           # job completion time
         self.is_first_run              = True         # whether the job has been scheduled at least once
-        self.calculate_turnaround_time = lambda: self.completion_time             - self.arrival_time
-        self.calculate_response_time   = lambda: self.first_run_time              - self.arrival_time
-        self.calculate_wait_time       = lambda: self.calculate_turnaround_time() - self.total_run_time
+
+    def calculate_turnaround_time(self):
+        return self.completion_time - self.arrival_time
+
+    def calculate_response_time(self):
+        return self.first_run_time - self.arrival_time
+
+    def calculate_wait_time(self):
+        return self.calculate_turnaround_time() - self.total_run_time
     
     # sets the is_first_run flag to False and the first run time to the specified value if first time running
     def update_first_run(self, time):
@@ -22,116 +36,262 @@ class Job:
     
     @staticmethod
     def read_jobs(input_file):
+        run_times, arrival_times = [], []
         with open(input_file, "r") as file:
-            # sort jobs based on their arrival times. by default, sorted() will pick the first item in the list if any two jobs have the same arrival time.
-            lines = sorted([line.split(" ") for line in file.readlines()], key=lambda token: int(token[1])) 
-            jobs  = [Job(run_time=int(job[0]), arrival_time=int(job[1]), job_number=i) for i, job in enumerate(lines)]
-            return jobs
+            # stream the file line by line, so only the parsed numbers are kept in memory. each line is "<run time> <arrival time>"
+            for line in file:
+                tokens = line.split(None, 2)
+                if tokens:
+                    run_times.append(int(tokens[0]))
+                    arrival_times.append(int(tokens[1]))
+        # sort jobs based on their arrival times. by default, sorted() will pick the first item in the list if any two jobs have the same arrival time.
+        order = sorted(range(len(arrival_times)), key=arrival_times.__getitem__)
+        jobs  = [Job(run_time=run_times[i], arrival_time=arrival_times[i], job_number=job_number) for job_number, i in enumerate(order)]
+        return jobs
 
 class Scheduler:
     def __init__(self, quantum, job_list):
         self.jobs              = []                  # list of all jobs
         self.completed_jobs    = []                  # list of completed jobs
-        self.print_str         = ""                  # used for debugging/visualization
-        self.fifo_srtn_current = 0                   # index for keeping track of current job in fifo/srtn
+        self.trace             = []                  # run-length encoded (job number, ticks) runs, -1 = idle. used for debugging/visualization
         self.total_time        = 0                   # total elapsed time
         self.quantum           = max(1, quantum)     # quantum length for rr. defaults to 1 if negative
         self.scheduler         = self.scheduler_fifo # default scheduler = fifo (fcfs)
+        self.rr_scheduler      = self.scheduler_rr_q1 if self.quantum == 1 else self.scheduler_rr # rr implementation for this quantum, picked once
         self.jobs.extend(job_list)                   # add all provided jobs to job list
 
+    # the trace expanded to one [PX] (or [--] when idle) per tick. only built when asked for. a run labelled with a tuple of job
+    # numbers (recorded by scheduler_rr_q1) is a round-robin cycle, one tick per job, repeated that many times.
+    @property
+    def print_str(self):
+        tags     = {job.job_number: f"[P{job.job_number}]" for job in self.jobs} # format each job's tag once, not once per run
+        tags[-1] = "[--]"
+        return "".join((tags[label] if isinstance(label, int) else "".join(map(tags.__getitem__, label))) * ticks for label, ticks in self.trace)
+
     def start_scheduler(self):
         # run the scheduler if size of job list is greater than 0.
         if len(self.jobs):
             self.scheduler()
 
     def scheduler_fifo(self):
-        while len(self.jobs) != len(self.completed_jobs):
-            scheduled = self.jobs[self.fifo_srtn_current]
-            if not self.__scheduled_job_has_arrived(scheduled):
-                continue
-
+        # hoist the attribute/method lookups out of the loop
+        advance_to, update_print_str, complete = self.__advance_to, self.__update_print_str, self.completed_jobs.append
+        # the job list is sorted by arrival time, so fifo is a single pass: each job runs to completion once it has arrived
+        for scheduled in self.jobs:
+            advance_to(scheduled.arrival_time) # idle until the job arrives, if it hasn't already
             scheduled.update_first_run(self.total_time) # update first run time 
-            self.__update_print_str(scheduled.job_number, scheduled.remaining_burst_time)
+            update_print_str(scheduled.job_number, scheduled.remaining_burst_time)
             self.total_time                += scheduled.remaining_burst_time # update total elapsed time
             scheduled.completion_time      = self.total_time                 # set job completion time to be updated total time
             scheduled.remaining_burst_time = 0                               # for consistency, set its remaining burst to 0
-            self.completed_jobs.append(scheduled)
-            self.fifo_srtn_current += 1
-        
+            complete(scheduled)
+
     def scheduler_rr(self):
-        while len(self.jobs) != len(self.completed_jobs):
-            scheduled = self.jobs[self.fifo_srtn_current]
-            # if the job hasn't arrived yet, go to next tick
-            if not self.__scheduled_job_has_arrived(scheduled):
+        ready       = deque() # queue of arrived, incomplete jobs in round-robin order
+        arrival_idx = 0       # index of the next job to arrive, since we sort the job list by arrival time when we read it in.
+        preempted   = None    # job whose quantum just expired. it rejoins the queue behind any jobs that arrived during its slice.
+        num_jobs    = len(self.jobs)
+        # hoist the attribute/method lookups out of the loop
+        admit_arrivals, run_rr_slice = self.__admit_arrivals, self.__run_rr_slice
+        # keep going while any job is still to arrive, waiting in the queue or just preempted
+        while arrival_idx < num_jobs or ready or preempted:
+            arrival_idx = admit_arrivals(ready, arrival_idx, preempted)
+            preempted   = None
+            if not ready: # the cpu idled until the next arrival
+                continue
+
+            preempted = run_rr_slice(ready)
+
+    # round robin specialised for quantum == 1. as long as no job arrives, every ready job runs for one tick per round in
+    # queue order, so all the rounds up to the next arrival (or the first completion) are run in a single step.
+    def scheduler_rr_q1(self):
+        ready       = deque() # queue of arrived, incomplete jobs in round-robin order
+        arrival_idx = 0       # index of the next job to arrive, since we sort the job list by arrival time when we read it in.
+        preempted   = None    # job that ran last. it rejoins the queue behind any jobs that arrived during its tick.
+        jobs        = self.jobs
+        num_jobs    = len(jobs)
+        # hoist the attribute/method lookups out of the loop
+        admit_arrivals, run_rr_slice, update_print_str, complete = self.__admit_arrivals, self.__run_rr_slice, self.__update_print_str, self.completed_jobs.append
+        # keep going while any job is still to arrive, waiting in the queue or just preempted
+        while arrival_idx < num_jobs or ready or preempted:
+            arrival_idx = admit_arrivals(ready, arrival_idx, preempted)
+            preempted   = None
+            if not ready: # the cpu idled until the next arrival
                 continue
-            
-            scheduled.update_first_run(self.total_time) # update first run time
-            remaining_burst = scheduled.remaining_burst_time
-            if remaining_burst <= self.quantum and remaining_burst > 0: # if remaining burst in (0, self.quantum], run to completion.
-                self.__update_print_str(scheduled.job_number, remaining_burst)
-                self.total_time                += remaining_burst # add remaining burst to total time
-                scheduled.completion_time      = self.total_time  # set job completion time to be updated total time
-                scheduled.remaining_burst_time = 0                # again, for consistency, set remaining burst to 0 and then add to list of completed jobs
-                self.completed_jobs.append(scheduled)
-            elif remaining_burst > 0:
-                # otherwise, update total elapsed time and decrement remaining burst time by quantum length
-                self.__update_print_str(scheduled.job_number, self.quantum)
-                self.total_time                += self.quantum
-                scheduled.remaining_burst_time -= self.quantum
-
-            # update next job index (and wrap around if necessary)
-            self.fifo_srtn_current = (self.fifo_srtn_current + 1) % len(self.jobs)
+
+            # number of full rounds that finish before the next arrival and before any job runs out of burst. the arrival bound
+            # is O(1), so it goes first and the queue is only scanned for the smallest burst if at least one round fits.
+            rounds = (jobs[arrival_idx].arrival_time - self.total_time) // len(ready) if arrival_idx < num_jobs else None
+            if rounds != 0:
+                smallest = min(job.remaining_burst_time for job in ready)
+                rounds   = smallest if rounds is None else min(rounds, smallest)
+            if rounds == 0: # the next arrival lands mid-round (or a zero-length job is ready), so fall back to a single tick
+                preempted = run_rr_slice(ready)
+                continue
+
+            start, survivors = self.total_time, deque()
+            for position, job in enumerate(ready):
+                job.update_first_run(start + position)
+                job.remaining_burst_time -= rounds
+                if job.remaining_burst_time == 0: # the job finishes on its tick of the last round
+                    job.completion_time = start + (rounds - 1) * len(ready) + position + 1
+                    complete(job)
+                else:
+                    survivors.append(job)
+            update_print_str(ready[0].job_number if len(ready) == 1 else tuple(job.job_number for job in ready), rounds)
+            self.total_time += rounds * len(ready)
+            # the job that ran on the very last tick rejoins the queue behind any job arriving right now
+            if survivors and survivors[-1] is ready[-1]:
+                preempted = survivors.pop()
+            ready = survivors
 
     def scheduler_srtn(self):
-        scheduled = self.jobs[0] # the job that arrived first is at index 0, since we sort the job list when we read it in.
-        while len(self.jobs) != len(self.completed_jobs):
-            if not self.__scheduled_job_has_arrived(scheduled):
+        ready_heap  = [] # min-heap of (remaining burst time, job index) for arrived, incomplete jobs. the index breaks ties in arrival order.
+        arrival_idx = 0  # index of the next job to arrive, since we sort the job list by arrival time when we read it in.
+        preempted   = -1 # index of the job that was running when the last arrival happened (-1 => none). it is kept out of the heap.
+        jobs        = self.jobs
+        num_jobs    = len(jobs)
+        # hoist the attribute/method lookups out of the loop
+        heappush, heappop, heappushpop = heapq.heappush, heapq.heappop, heapq.heappushpop
+        advance_to, update_print_str, complete = self.__advance_to, self.__update_print_str, self.completed_jobs.append
+        # keep going while any job is still to arrive, waiting in the heap or just preempted
+        while arrival_idx < num_jobs or ready_heap or preempted != -1:
+            # move every job that has arrived by the current tick into the ready heap
+            while arrival_idx < num_jobs and jobs[arrival_idx].arrival_time <= self.total_time:
+                heappush(ready_heap, (jobs[arrival_idx].remaining_burst_time, arrival_idx))
+                arrival_idx += 1
+            if preempted != -1:
+                # a single heap operation decides whether the running job carries on or a newly arrived job takes over
+                _, scheduled_idx = heappushpop(ready_heap, (jobs[preempted].remaining_burst_time, preempted))
+                preempted        = -1
+            elif ready_heap:
+                _, scheduled_idx = heappop(ready_heap) # the job with the shortest remaining burst time
+            else: # if no job is ready, the cpu idles until the next one arrives
+                advance_to(jobs[arrival_idx].arrival_time)
                 continue
 
+            scheduled = jobs[scheduled_idx]
             scheduled.update_first_run(self.total_time)
-            # if
-            if scheduled.remaining_burst_time > 0:
-                self.__update_print_str(scheduled.job_number, 1)
-                self.total_time                += 1     # increment ticker by 1
-                scheduled.remaining_burst_time -= 1     # decrement job remaining burst time by 1
-                if scheduled.remaining_burst_time == 0: # if scheduled job is complete, set its completion time to 0 add it to list of completed jobs
-                    scheduled.completion_time = self.total_time
-                    self.completed_jobs.append(scheduled)
-                # each tick, find the next job whose arrival time is either before the current one or at the current tick, with a remaining burst time > 0.
-                filtered_jobs = list(filter(lambda job: job.arrival_time <= self.total_time and job.remaining_burst_time > 0, self.jobs))
-                # if another job remains, schedule it. otherwise, continue with the currently scheduled job.
-                scheduled     = min(filtered_jobs, key=lambda job: job.remaining_burst_time) if len(filtered_jobs) else scheduled
+            # the shortest job can only be preempted by a new arrival, so run it until it completes or the next job arrives
+            run = scheduled.remaining_burst_time
+            if arrival_idx < num_jobs:
+                run = min(run, jobs[arrival_idx].arrival_time - self.total_time)
+            update_print_str(scheduled.job_number, run)
+            self.total_time                += run
+            scheduled.remaining_burst_time -= run
+            if scheduled.remaining_burst_time == 0: # if scheduled job is complete, set its completion time and add it to list of completed jobs
+                scheduled.completion_time = self.total_time
+                complete(scheduled)
+            else: # otherwise, it competes with the job(s) that just arrived on the next iteration
+                preempted = scheduled_idx
 
     def stat(self):
         if len(self.completed_jobs):
-            self.completed_jobs.sort(key=lambda job: job.job_number)
-            print("\n".join(f"Job {job.job_number:3d} -- Turnaround {job.calculate_turnaround_time():3.2f}  Wait {job.calculate_wait_time():3.2f}" for job in self.completed_jobs))
-            turnaround_average = sum([job.calculate_turnaround_time() for job in self.completed_jobs]) / len(self.completed_jobs)
-            waiting_average    = sum([job.calculate_wait_time() for job in self.completed_jobs])      / len(self.completed_jobs)
+            self.completed_jobs.sort(key=attrgetter("job_number"))
+            # single pass: compute each job's turnaround and wait time once, use them for its line and add them to the running totals
+            lines, turnaround_total, waiting_total = [], 0, 0
+            for job in self.completed_jobs:
+                turnaround        = job.completion_time - job.arrival_time
+                wait              = turnaround - job.total_run_time
+                turnaround_total += turnaround
+                waiting_total    += wait
+                lines.append(f"Job {job.job_number:3d} -- Turnaround {turnaround:3.2f}  Wait {wait:3.2f}")
+            print("\n".join(lines))
+            turnaround_average = turnaround_total / len(self.completed_jobs)
+            waiting_average    = waiting_total    / len(self.completed_jobs)
             print(f"Average -- Turnaround {turnaround_average:3.2f}  Wait {waiting_average:3.2f}")
     
+    # moves every job that has arrived by the current tick to the back of the rr ready queue, followed by the job preempted at this
+    # tick (if any), so jobs that arrived during its slice go ahead of it. if no job is ready after that, the cpu idles until the
+    # next arrival. returns the index of the next job to arrive.
+    def __admit_arrivals(self, ready, arrival_idx, preempted):
+        jobs = self.jobs
+        while arrival_idx < len(jobs) and jobs[arrival_idx].arrival_time <= self.total_time:
+            ready.append(jobs[arrival_idx])
+            arrival_idx += 1
+        if preempted:
+            ready.append(preempted)
+        if not ready:
+            self.__advance_to(jobs[arrival_idx].arrival_time)
+        return arrival_idx
+
+    # runs the job at the front of the ready queue for one quantum (or to completion). returns it if it still has burst left, otherwise None.
+    def __run_rr_slice(self, ready):
+        scheduled = ready.popleft()
+        scheduled.update_first_run(self.total_time) # update first run time
+        run = min(scheduled.remaining_burst_time, self.quantum) # run for a full quantum, or to completion if less remains
+        self.__update_print_str(scheduled.job_number, run)
+        self.total_time                += run
+        scheduled.remaining_burst_time -= run
+        if scheduled.remaining_burst_time == 0: # if scheduled job is complete, set its completion time and add it to list of completed jobs
+            scheduled.completion_time = self.total_time
+            self.completed_jobs.append(scheduled)
+            return None
+        return scheduled
+
     def __update_print_str(self, job_number, repeat):
-        self.print_str += ("[--]" if job_number == -1 else f"[P{job_number}]") * repeat
+        # extend the last run if the same job (or idle) continues, otherwise start a new run
+        if self.trace and self.trace[-1][0] == job_number:
+            self.trace[-1] = (job_number, self.trace[-1][1] + repeat)
+        else:
+            self.trace.append((job_number, repeat))
 
-    # returns false if the current job has not yet arrived, otherwise true. used for ticker progression.
-    def __scheduled_job_has_arrived(self, job):
-        if self.total_time < job.arrival_time:
-            self.total_time += 1
-            self.__update_print_str(-1, 1)
-            return False
-        return True
+    # advances the ticker to the given time in one step, recording the gap as idle. does nothing if that time has already passed.
+    def __advance_to(self, time):
+        gap = time - self.total_time
+        if gap > 0:
+            self.total_time += gap
+            self.__update_print_str(-1, gap)
+
+# runs a single scheduling policy on the given jobs and returns the scheduler once every job has completed.
+# defined at module level so that run_policies can send it to worker processes.
+def run_policy(jobs, algorithm, quantum):
+    scheduler           = Scheduler(quantum, jobs)
+    scheduler.scheduler = {"rr": scheduler.rr_scheduler, "srtn": scheduler.scheduler_srtn}.get(algorithm, scheduler.scheduler_fifo)
+    scheduler.start_scheduler()
+    return scheduler
+
+# runs every (algorithm, quantum) policy on the same jobs in parallel, with up to one worker process per policy (capped at the
+# cpu count). the simulations are independent of each other, and each worker gets its own copy of the jobs. returns the finished
+# schedulers in policy order.
+def run_policies(jobs, policies):
+    with ProcessPoolExecutor(max_workers=min(len(policies), os.cpu_count() or 1)) as executor:
+        return list(executor.map(run_policy, itertools.repeat(jobs), *zip(*policies)))
 
 def main():
     parser = ArgumentParser()
     parser.add_argument("file", help="the job file to be used", type=str, default="job_list.txt")
     parser.add_argument("-p", "--algorithm", help="the scheduling algorithm to be used (rr, srtn, fifo). defaults to fifo", required=False, type=str.lower, default="fifo")
     parser.add_argument("-q",  "--quantum", help="the quantum to be used (required for rr). defaults to 1", required=False, type=int, default=1)
+    parser.add_argument("-t", "--print-trace", help="print the execution trace, one [PX] per tick ([--] when idle)", action="store_true")
+    parser.add_argument("--policies", help="comma-separated policies to simulate in parallel, e.g. fifo,rr:1,rr:4,srtn. only rr takes a quantum; without one it uses -q. overrides -p", required=False, type=str.lower)
     args = parser.parse_args()
 
-    scheduler           = Scheduler(args.quantum, Job.read_jobs(args.file))
-    scheduler.scheduler = {"rr": scheduler.scheduler_rr, "srtn": scheduler.scheduler_srtn}.get(args.algorithm, scheduler.scheduler_fifo)
-    scheduler.start_scheduler()
-    scheduler.stat()
+    jobs = Job.read_jobs(args.file)
+    if not args.policies:
+        scheduler = run_policy(jobs, args.algorithm, args.quantum)
+        scheduler.stat()
+        if args.print_trace:
+            print(scheduler.print_str)
+        return
+
+    # validate every policy up front, so an unknown name is never run (and labelled) as the fifo fallback
+    names, policies = [name.strip() for name in args.policies.split(",")], []
+    for name in names:
+        algorithm, _, quantum = name.partition(":")
+        if algorithm not in ("fifo", "rr", "srtn"):
+            parser.error(f"unknown policy '{name}' in --policies (expected fifo, rr[:quantum] or srtn)")
+        if quantum and algorithm != "rr":
+            parser.error(f"policy '{name}' takes no quantum (only rr does)")
+        try:
+            policies.append((algorithm, int(quantum) if quantum else args.quantum))
+        except ValueError:
+            parser.error(f"invalid quantum in policy '{name}': expected an integer")
+    for name, scheduler in zip(names, run_policies(jobs, policies)):
+        print(f"Policy {name}")
+        scheduler.stat()
+        if args.print_trace:
+            print(scheduler.print_str)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file